@@ -1,4 +1,7 @@
+import functools
+import os
 import re
+import sys
 from typing import List,Tuple,Union
 
 #Each token is represented as a tuple: (type,value)
@@ -28,38 +31,44 @@ class SimpleConfigLexer:
         self.tokens = self.tokenize()
     
     def tokenize(self) -> List[Token]:
-        pattern = "|".join(f"(?P<{name}>{regex})" for name,regex in self.TOKEN_PATTERNS)
-        token_re = re.compile(pattern)
-
-        pos = 0
+        text = self.config_text
+        expected = 0 #where the next token must start; anything else is a gap
         tokens: List[Token] = []
 
-        while pos < len(self.config_text):
-            match = token_re.match(self.config_text,pos)
-            if not match:
-                raise SyntaxError(f"Unexpected character at position {pos}: {self.config_text[pos]!r}")
+        for match in _TOKEN_RE.finditer(text):
+            if match.start() != expected:
+                raise SyntaxError(f"Unexpected character at position {expected}: {text[expected]!r}")
+            expected = match.end()
+
             kind = match.lastgroup
-            value = match.group()
+            if kind in _SKIP:
+                continue #skip it
+            tokens.append((kind,match.group()))
 
-            if kind in ("WHITESPACE","COMMENT"):
-                pass #skip it
-            elif kind == "STRING":
-                tokens.append((kind,value))
-            else:
-                tokens.append((kind,value))
-            pos = match.end()
-        
+        if expected != len(text):
+            raise SyntaxError(f"Unexpected character at position {expected}: {text[expected]!r}")
         return tokens
+
+#Combined pattern is compiled once per process rather than once per lexer.
+_TOKEN_RE = re.compile(
+    "|".join(f"(?P<{name}>{regex})" for name,regex in SimpleConfigLexer.TOKEN_PATTERNS)
+)
+
+#Token kinds the lexer drops instead of emitting
+_SKIP = frozenset(("WHITESPACE","COMMENT"))
     
 #optional just to visualize
 def visualize_token_stream(tokens: List[Token]) -> None:
     indent = 0
+    lines = [] #collected and written once instead of a print per token
     for token_type,value in tokens:
         if token_type == "RBRACE":
             indent -= 1
-        print("    "*indent + f"{token_type:10}: {value}")
+        lines.append("    "*indent + f"{token_type:10}: {value}")
         if token_type == "LBRACE":
             indent += 1
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
 
 ConfigDict = dict[str,Union[str,"ConfigDict",list]]
 
@@ -86,17 +95,24 @@ class SimpleConfigParser:
     
     def _parse_block(self) -> ConfigDict:
         """
-        Parses a block of configuration. This is a recursive function:
-        - Called when entering a new { ... } block.
-        - Returns a dictionary representing the contents of that block.
+        Parses the configuration iteratively, using an explicit stack of open blocks
+        instead of recursion (so nesting depth is not bound by the recursion limit):
+        - Each stack entry is (block_dict, continuation), where the continuation
+          (parent, key, args) says where the block is attached once its '}' is reached.
+        - Returns the dictionary for the top-level block.
         """
-        config: ConfigDict = {} 
+        root: ConfigDict = {}
+        stack = [(root, None)]
         while self.pos < len(self.tokens):
+            config = stack[-1][0]
             token_type, token_value = self.tokens[self.pos]
 
             if token_type == "RBRACE":
                 self.pos += 1
-                return config
+                if len(stack) == 1:
+                    return root
+                self._close_block(stack)
+                continue
             
             if token_type != "WORD":
                 raise SyntaxError(f"Expected directive name(WORD),but got {token_type} '{token_value}'")
@@ -113,23 +129,7 @@ class SimpleConfigParser:
                     if len(args) > 1:
                         raise SyntaxError(f"Block '{key}' can only have one argument. Found: {args}")
                     self.pos += 1 # consume the '{'
-                    block = self._parse_block()
-
-                    if args:
-                        arg_key = args[0]
-                        if key not in config:
-                            config[key] = {}
-                        if not isinstance(config[key],dict):
-                             raise SyntaxError(f"Cannot nest block under non-dictionary directive '{key}'")
-                        config[key][arg_key] = block
-                    else:
-                        if key in config:
-                            if isinstance(config[key],list):
-                                config[key].append(block)
-                            else:
-                                config[key] = [config[key],block]
-                        else:
-                            config[key] = block
+                    stack.append(({}, (config, key, args)))
                     break 
                 
                 elif t_type == "SEMICOLON":
@@ -156,7 +156,33 @@ class SimpleConfigParser:
                     self.pos += 1
             else:
                 raise SyntaxError(f"Unexpected end of input after key '{key}' — expected ';' or '{{'.")
-        return config
+
+        #Input ended inside open blocks: attach them as if they were closed.
+        while len(stack) > 1:
+            self._close_block(stack)
+        return root
+
+    @staticmethod
+    def _close_block(stack: list) -> None:
+        """
+        Pops the innermost open block and attaches it to its parent.
+        """
+        block, (config, key, args) = stack.pop()
+        if args:
+            arg_key = args[0]
+            if key not in config:
+                config[key] = {}
+            if not isinstance(config[key],dict):
+                 raise SyntaxError(f"Cannot nest block under non-dictionary directive '{key}'")
+            config[key][arg_key] = block
+        else:
+            if key in config:
+                if isinstance(config[key],list):
+                    config[key].append(block)
+                else:
+                    config[key] = [config[key],block]
+            else:
+                config[key] = block
                       
 class ServerConfig:
     """
@@ -167,6 +193,9 @@ class ServerConfig:
     """
     def __init__(self,config_dict: dict):
         self.config = config_dict 
+        #Derived views are computed once; the config is read-only after load.
+        self._listen_ports = self._build_listen_ports()
+        self._routes = self._build_routes()
     
     def get_servers(self) -> list[dict]:
         """
@@ -186,6 +215,19 @@ class ServerConfig:
     
     @property
     def listen_ports(self) -> list[int]:
+        """
+        All port numbers from server blocks, as extracted at load time.
+        """
+        return self._listen_ports
+
+    @property
+    def routes(self) -> dict[int, dict[str, str]]:
+        """
+        Nested dictionary {port: {path: root_dir}}, as built at load time.
+        """
+        return self._routes
+
+    def _build_listen_ports(self) -> list[int]:
         """
         Extracts all port numbers from server blocks.
         Assumes port is defined via 'listen' directive.
@@ -200,8 +242,7 @@ class ServerConfig:
                     raise ValueError(f"Invalid port number: {port!r}")
         return ports
     
-    @property
-    def routes(self) -> dict[int, dict[str, str]]:
+    def _build_routes(self) -> dict[int, dict[str, str]]:
         """
         Returns a nested dictionary mapping:
         {port: {path: root_dir}} for each server block.
@@ -219,14 +260,21 @@ class ServerConfig:
                     if isinstance(inner, dict) and "root" in inner:
                         route_map[path] = inner["root"]
             mapping[port] = route_map
-        print(mapping)
         return mapping
 
 
 def load_config(path: str) -> ServerConfig:
     """
     Reads a config file, tokenizes and parses it, then wraps in ServerConfig.
+    Results are cached on (path, mtime, size): reloading an unchanged file returns
+    the same (read-only) ServerConfig without lexing or parsing again.
     """
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    return _load_config(path,st.st_mtime_ns,st.st_size)
+
+@functools.lru_cache(maxsize=8)
+def _load_config(path: str, mtime_ns: int, size: int) -> ServerConfig:
     with open(path,"r",encoding="utf-8") as f:
         config_text = f.read()
     
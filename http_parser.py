@@ -1,4 +1,13 @@
-from typing import Dict,Optional,Tuple
+from typing import Dict,Optional,Tuple,Union
+
+#Header names are kept as lowercased bytes; names the parser consults are
+#built once here rather than per lookup.
+_H_CONTENT_LENGTH = b"content-length"
+
+#Largest header block (start line + headers) accepted before CRLF CRLF; a
+#client that keeps sending header bytes past this gets InvalidMessageError
+#instead of growing the session buffer forever.
+MAX_HEADER_SIZE = 64 * 1024
 
 
 #Custom exception classes for precise error handling in our HTTP #parser.
@@ -24,7 +33,7 @@ class HTTPMessage:
         method:  HTTP method (e.g. 'GET', 'POST') or response status code.
         url:     Request target (e.g. '/index.html') or response reason phrase.
         version: HTTP version (e.g. 'HTTP/1.1').
-        headers: dict of header-name (lowercased) → header-value.
+        headers: dict of header-name (lowercased bytes) → header-value (bytes).
         body:    Raw bytes of the message body.
     """
      
@@ -33,7 +42,7 @@ class HTTPMessage:
                 method: str,
                 url: str,
                 version: str,
-                headers: Dict[str,str],
+                headers: Dict[bytes,bytes],
                 body: bytes
     ):
         self.method = method
@@ -60,14 +69,17 @@ class HTTPParser:
     """
 
     @staticmethod
-    def parse_message(data: bytes) -> Tuple[Optional[HTTPMessage], int]:
+    def parse_message(data: Union[bytes,bytearray]) -> Tuple[Optional[HTTPMessage], int]:
         """
         Parse exactly one HTTP message from the start of `data`.
 
-        :param data: Bytes that may contain zero, one, or multiple messages.
+        :param data: Bytes (or a bytearray buffer) that may contain zero, one,
+                     or multiple messages. Nothing returned keeps a reference
+                     into `data`, so the caller may mutate it afterwards.
         :return: A tuple (message, bytes_consumed). If data is empty, (None, 0).
         :raises IncompleteMessageError: headers or body are incomplete.
-        :raises InvalidMessageError:    data is syntactically invalid.
+        :raises InvalidMessageError:    data is syntactically invalid, or the
+                                        header block exceeds MAX_HEADER_SIZE.
         """
         #----A) Empty buffer: nothing to parse yet
         if not data:
@@ -75,42 +87,50 @@ class HTTPParser:
         
         #----B) Locate end of headers("\r\n\r\n").
         sep = b"\r\n\r\n"
-        idx = data.find(sep)
+        idx = data.find(sep, 0, MAX_HEADER_SIZE + len(sep))
         if idx == -1:
+            if len(data) >= MAX_HEADER_SIZE + len(sep):
+                #More data cannot make an oversized header block valid.
+                raise InvalidMessageError(
+                    f"Header block exceeds {MAX_HEADER_SIZE} bytes."
+                )
             #Missing header terminator -> need more data.
             raise IncompleteMessageError(
                 "Incomplete headers: missing CRLF CRLF separator."
             )
         
-        #Split header block from potential body.
-        header_text = data[:idx].decode("iso-8859-1",errors="replace")
-        rest = data[idx + len(sep):]
+        #Split header block from potential body. The header block stays as
+        #bytes (an immutable copy, even when `data` is a bytearray, so header
+        #names can be used as dict keys); only the start line is decoded.
+        header_block = bytes(data[:idx])
+        body_start = idx + len(sep)
+        available = len(data) - body_start
 
         #---C) Break headers into lines
 
-        lines = header_text.split("\r\n")
+        lines = header_block.split(b"\r\n")
         start_line = lines[0]
         header_lines = lines[1:]
 
         #---D) Parse start line into method,URL/status,version.
-        parts = start_line.split(" ",2)
+        parts = start_line.split(b" ",2)
         if len(parts) != 3:
             # Syntax error cannot be fixed by more data --> invalid.
-            raise InvalidMessageError(f"Malformed start line: {start_line}")
-        method, url, version = parts
+            raise InvalidMessageError(f"Malformed start line: {start_line!r}")
+        method, url, version = (part.decode("iso-8859-1") for part in parts)
 
         #--- E) Parse headers into dict.
-        headers: Dict[str, str] = {} 
+        headers: Dict[bytes, bytes] = {} 
         for line in header_lines:
             if not line:
                 continue #skip stray blank lines
-            if ":" not in line:
+            name, colon, value = line.partition(b":")
+            if not colon:
                 raise InvalidMessageError(f"Bad header line: {line!r}")
-            name, value = line.split(":",1)
             headers[name.strip().lower()] = value.strip()
         
         # --- F) Determine body length via Content-Length, if present
-        length_hdr = headers.get("content-length")
+        length_hdr = headers.get(_H_CONTENT_LENGTH)
         if length_hdr is not None:
             try:
                 length = int(length_hdr)
@@ -119,18 +139,21 @@ class HTTPParser:
                 raise InvalidMessageError(
                     f"Invalid Content-Length value: {length_hdr!r}"
                 )
-            if len(rest) < length:
+            if available < length:
                 # Not enough data for full body --> incomplete
                 raise IncompleteMessageError(
-                    f"Body incomplete: expected {length} bytes, got {len(rest)}."
+                    f"Body incomplete: expected {length} bytes, got {available}."
                 )
-            body = rest[:length]
-            consumed = idx + len(sep) + length
+            # Slice through a memoryview so the body is copied exactly once;
+            # the view is released before returning so `data` stays resizable.
+            with memoryview(data) as view:
+                body = bytes(view[body_start:body_start + length])
+            consumed = body_start + length
         
         else:
             # No Content-Length — assume no body (e.g. for GET, HEAD).
             body = b""
-            consumed = idx + len(sep)
+            consumed = body_start
         message = HTTPMessage(method,url,version,headers,body)
         return message,consumed
 
@@ -1,29 +1,136 @@
+import functools
+import os
 import socket
+import threading
 from typing import Tuple, Optional, Dict
-from config_parser import load_config, ServerConfig
-from http_parser import HTTPParser, HTTPMessage
+from config_parser import load_config
+from http_parser import (
+    HTTPParser,
+    HTTPMessage,
+    IncompleteMessageError,
+    InvalidMessageError,
+)
+
+# Bytes read per recv_into(); large reads amortize syscall cost on big uploads.
+RECV_SIZE = 65536
+
+# Seconds a connection may sit idle in recv/send before it is closed, so a
+# silent or stalled client doesn't hold its thread and buffer forever.
+CONNECTION_TIMEOUT = 30
+
+# Files up to this size are served from the in-memory cache; larger ones via sendfile().
+CACHE_MAX_FILE_SIZE = 256 * 1024
+
+# Request header names/values consulted per request (headers are lowercased bytes).
+_H_CONNECTION = b"connection"
+_KEEP_ALIVE = b"keep-alive"
+
+# Response templates, built once; only Content-Length varies per response.
+_OK_PREFIX = b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nContent-Length: "
+_KEEP_ALIVE_END = b"\r\nConnection: keep-alive\r\n\r\n"
+_CLOSE_END = b"\r\n\r\n"
+_NOT_FOUND_BODY = b"404 Not Found"
+_NOT_FOUND_RESPONSE = (
+    b"HTTP/1.1 404 Not Found\r\n"
+    b"Content-Length: " + str(len(_NOT_FOUND_BODY)).encode() + b"\r\n"
+    b"Content-Type: text/html\r\n\r\n" + _NOT_FOUND_BODY
+)
+_BAD_REQUEST_BODY = b"400 Bad Request"
+_BAD_REQUEST_RESPONSE = (
+    b"HTTP/1.1 400 Bad Request\r\n"
+    b"Content-Length: " + str(len(_BAD_REQUEST_BODY)).encode() + b"\r\n"
+    b"Content-Type: text/html\r\n"
+    b"Connection: close\r\n\r\n" + _BAD_REQUEST_BODY
+)
 
 # Route Matching Logic
 
 
-class RouteMatcher:
+class _RouteNode:
+    __slots__ = ("children", "base")
+
+    def __init__(self):
+        self.children: Dict[str, "_RouteNode"] = {}
+        # root + location path, joined once at insert time.
+        self.base: Optional[str] = None
+
+
+class RouteTrie:
     """
-    Selects the server block based on port and matches location blocks using longest URI prefix.
+    Prefix trie over the location paths of one server block.
+    Lookups walk the URI once and resolve it against the longest matching prefix.
     """
 
-    @staticmethod
-    def match_location(locations, uri: str):
+    def __init__(self, locations: Optional[Dict[str, str]] = None):
+        self._head = _RouteNode()
+        # File served for a bare "/" request; set when the "/" location is inserted.
+        self.index_path: Optional[str] = None
+        for path, root_dir in (locations or {}).items():
+            self.insert(path, root_dir)
+
+    def insert(self, path: str, root_dir: str):
+        node = self._head
+        for char in path:
+            node = node.children.setdefault(char, _RouteNode())
+        node.base = root_dir + path
+        if path == "/":
+            self.index_path = node.base + "index.html"
+
+    def resolve(self, uri: str) -> Optional[str]:
         """
-        Finds the location block with the longest prefix match.
+        Maps a URI to root + URI using the location with the longest prefix match.
+        Returns None if no location matches.
         """
+        node = self._head
+        matched_base, matched_depth = node.base, 0
+        for depth, char in enumerate(uri, 1):
+            node = node.children.get(char)
+            if node is None:
+                break
+            if node.base is not None:
+                matched_base, matched_depth = node.base, depth
+        if matched_base is None:
+            return None
+        return matched_base + uri[matched_depth:]
+
+
+# Static File Cache
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_read(path: str, mtime_ns: int) -> Tuple[bytes, bytes]:
+    """
+    Returns (Content-Length value, file bytes) for a small static file.
+    The mtime is part of the key, so an edited file is re-read on next request.
+    """
+    with open(path, "rb") as f:
+        body = f.read()
+    return str(len(body)).encode(), body
+
+
+# Socket Output
 
-        matched_location = None
-        longest_prefix = -1
-        for path, root_dir in locations.items():
-            if uri.startswith(path) and len(path) > longest_prefix:
-                matched_location = root_dir
-                longest_prefix = len(path)
-        return matched_location
+
+def _send_gather(sock: socket.socket, *chunks: bytes):
+    """
+    Sends all chunks as one gather-write (writev) without joining them first.
+    Falls back to one sendall per chunk where sendmsg is unavailable (Windows).
+    """
+    if not hasattr(sock, "sendmsg"):
+        for chunk in chunks:
+            sock.sendall(chunk)
+        return
+
+    buffers = [memoryview(chunk) for chunk in chunks if chunk]
+    while buffers:
+        sent = sock.sendmsg(buffers)
+        # Drop fully written buffers and trim the one that was cut short.
+        while sent:
+            if sent >= len(buffers[0]):
+                sent -= len(buffers.pop(0))
+            else:
+                buffers[0] = buffers[0][sent:]
+                sent = 0
 
 
 # Data Buffer
@@ -31,18 +138,27 @@ class RouteMatcher:
 
 class DataProvider:
     def __init__(self):
-        self._data = b""
+        # bytearray grows and shrinks in place, so buffering a long session
+        # costs amortized O(n) instead of re-copying on every recv.
+        self._data = bytearray()
+        # Reused landing area for recv_into(), so reads don't allocate.
+        self._recv_buf = bytearray(RECV_SIZE)
+        self._recv_view = memoryview(self._recv_buf)
 
     @property
-    def data(self) -> bytes:
+    def data(self) -> bytearray:
         return self._data
 
-    @data.setter
-    def data(self, new_data: bytes):
-        self._data += new_data
-
     def reduce_data(self, size: int):
-        self._data = self._data[size:]
+        del self._data[:size]
+
+    def recv_from(self, sock: socket.socket) -> int:
+        """
+        Reads once from `sock` straight into the buffer; returns bytes read (0 on EOF).
+        """
+        n = sock.recv_into(self._recv_buf)
+        self._data.extend(self._recv_view[:n])
+        return n
 
 
 # Message Processor
@@ -60,7 +176,8 @@ class HTTPProcessor:
             if http_message:
                 self.data_provider.reduce_data(bytes_consumed)
             return http_message
-        except RuntimeError:
+        except IncompleteMessageError:
+            # Partial request (or tail of a pipelined batch): wait for more bytes.
             return None
 
 
@@ -72,68 +189,85 @@ class HTTPSession:
         self,
         conn: socket.socket,
         client_address: Tuple[str, int],
-        port: int,
-        server_config: ServerConfig,
+        route_trie: RouteTrie,
     ):
         self.connection = conn
         self.addr = client_address
         self.data_provider = DataProvider()
         self.http_processor = HTTPProcessor(self.data_provider)
-        self.port = port
-        self.server_config = server_config
+        self.route_trie = route_trie
         self.active = True
 
     def handle(self):
         print(f"[Session] Connected by {self.addr}")
+        try:
+            try:
+                self._serve_requests()
+            except InvalidMessageError as e:
+                # Malformed request: more bytes can't fix it, so answer and close.
+                print(f"[Session] {self.addr} bad request: {e}")
+                self._send_400()
+        except socket.timeout:
+            print(f"[Session] {self.addr} timed out")
+        except OSError as e:
+            print(f"[Session] {self.addr} dropped: {e}")
+        finally:
+            self.connection.close()
+
+    def _serve_requests(self):
         while self.active:
-            data = self.connection.recv(1024)
-            if not data:
+            if not self.data_provider.recv_from(self.connection):
                 break
-            self.data_provider.data = data
 
             while request := self.http_processor.get_one_http_message():
                 url = request.url
-                root = "html"
                 if url == "/":
-                    url = "/index.html"
+                    file_path = self.route_trie.index_path
                 else:
-                    root = RouteMatcher.match_location(
-                        self.server_config.routes[self.port], url
-                    )
-
-                file_path = f"{root}{url}"
+                    file_path = self.route_trie.resolve(url)
                 print(f"[Request] {url} => {file_path}")
+                if file_path is None:
+                    self._send_404()
+                    continue
+
                 try:
-                    with open(file_path, "rb") as f:
-                        body = f.read()
-                        headers = (
-                            "HTTP/1.1 200 OK\r\n"
-                            f"Content-Length: {len(body)}\r\n"
-                            "Content-Type: text/html\r\n"
+                    st = os.stat(file_path)
+                    if st.st_size <= CACHE_MAX_FILE_SIZE:
+                        content_length, body = _cached_read(
+                            file_path, st.st_mtime_ns
                         )
-                        if (
-                            "keep-alive"
-                            in request.headers.get("connection", "").lower()
-                        ):
-                            headers += "Connection: keep-alive\r\n"
-                        else:
-                            self.active = False
-                        headers += "\r\n"
-                        self.connection.sendall(headers.encode() + body)
-                except Exception as e:
+                        f = None
+                    else:
+                        f = open(file_path, "rb")
+                        body = b""
+                except (OSError, ValueError) as e:
+                    # ValueError: the path contains a NUL byte.
                     print(f"[Error] {e}")
                     self._send_404()
+                    continue
 
-        self.connection.close()
+                if _KEEP_ALIVE in request.headers.get(_H_CONNECTION, b"").lower():
+                    end = _KEEP_ALIVE_END
+                else:
+                    end = _CLOSE_END
+                    self.active = False
+                # The large-file handle is closed even if the client goes away mid-send.
+                try:
+                    if f is not None:
+                        content_length = str(os.fstat(f.fileno()).st_size).encode()
+                    _send_gather(self.connection, _OK_PREFIX, content_length, end, body)
+                    if f is not None:
+                        # Large files are streamed kernel-side without entering Python.
+                        self.connection.sendfile(f)
+                finally:
+                    if f is not None:
+                        f.close()
 
     def _send_404(self):
-        msg = b"404 Not Found"
-        headers = (
-            "HTTP/1.1 404 Not Found\r\n"
-            f"Content-Length: {len(msg)}\r\n"
-            "Content-Type: text/html\r\n\r\n"
-        )
-        self.connection.sendall(headers.encode() + msg)
+        self.connection.sendall(_NOT_FOUND_RESPONSE)
+
+    def _send_400(self):
+        self.connection.sendall(_BAD_REQUEST_RESPONSE)
 
 
 # Server Entrypoint
@@ -142,10 +276,15 @@ class HTTPSession:
 class Server:
     """
     Main Server class. Reads config, binds to the correct port, and handle requests.
+    Each accepted connection is served on its own thread so slow clients don't block others.
     """
 
     def __init__(self, config_path: str):
         self.config = load_config(config_path)
+        self.route_tries = {
+            port: RouteTrie(locations)
+            for port, locations in self.config.routes.items()
+        }
 
     def start(self):
         port = self.config.listen_ports[0]
@@ -155,8 +294,9 @@ class Server:
             print(f"[Server] is listening on port {port}")
             while True:
                 conn, addr = s.accept()
-                session = HTTPSession(conn, addr, port, self.config)
-                session.handle()
+                conn.settimeout(CONNECTION_TIMEOUT)
+                session = HTTPSession(conn, addr, self.route_tries[port])
+                threading.Thread(target=session.handle, daemon=True).start()
 
 
 # start Server
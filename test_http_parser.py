@@ -0,0 +1,58 @@
+import time
+import unittest
+
+from http_parser import (
+    MAX_HEADER_SIZE,
+    HTTPParser,
+    IncompleteMessageError,
+    InvalidMessageError,
+)
+
+
+class HeaderParseTest(unittest.TestCase):
+    """
+    Header parsing runs on unauthenticated input while holding the GIL, so
+    malformed lines must be rejected, and rejected without pathological cost.
+    """
+
+    def assert_rejected(self, data: bytes):
+        start = time.perf_counter()
+        with self.assertRaises(InvalidMessageError):
+            HTTPParser.parse_message(data)
+        # Loose bound: catches super-linear scans (tens of seconds), not noise.
+        self.assertLess(time.perf_counter() - start, 2.0)
+
+    def test_long_line_without_colon(self):
+        self.assert_rejected(
+            b"GET / HTTP/1.1\r\nHost: a\r\n" + b"x" * 65536 + b"\r\n\r\n"
+        )
+
+    def test_long_line_without_colon_after_whitespace(self):
+        self.assert_rejected(
+            b"GET / HTTP/1.1\r\n" + b" " * 65536 + b"\rx\r\n\r\n"
+        )
+
+    def test_header_block_size_limit(self):
+        partial = b"GET / HTTP/1.1\r\nX-Pad: "
+        partial += b"a" * (MAX_HEADER_SIZE - len(partial))
+        with self.assertRaises(IncompleteMessageError):
+            HTTPParser.parse_message(partial)
+        self.assert_rejected(partial + b"a" * 4)
+
+    def test_values_are_stripped(self):
+        message, _ = HTTPParser.parse_message(
+            b"GET / HTTP/1.1\r\nHost: \t a \t\r\nX-Empty:\r\n\r\n"
+        )
+        self.assertEqual(message.headers, {b"host": b"a", b"x-empty": b""})
+
+    def test_bytearray_buffer(self):
+        # The server hands the parser its bytearray receive buffer.
+        message, consumed = HTTPParser.parse_message(
+            bytearray(b"POST / HTTP/1.1\r\nContent-Length: 2\r\n\r\nhiGET")
+        )
+        self.assertEqual(message.headers, {b"content-length": b"2"})
+        self.assertEqual((message.body, consumed), (b"hi", 40))
+
+
+if __name__ == "__main__":
+    unittest.main()